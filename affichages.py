@@ -19,9 +19,10 @@ def afficher_banniere(titre):
         titre (str): Le titre à afficher au centre de la bannière.
     """
     largeur_banniere = len(titre) + 20
-    print(largeur_banniere * "#")
-    print(f"{titre:^{largeur_banniere}}")
-    print(largeur_banniere * "#")
+    bordure = largeur_banniere * "#"
+    print(bordure)
+    print(titre.center(largeur_banniere))
+    print(bordure)
 
 
 def afficher_menu_principal():
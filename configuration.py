@@ -8,6 +8,7 @@ comme les frais de transaction.
 """
 
 import math
+import struct
 from pathlib import Path
 from utilitaires import convertir_dollars_vers_centimes
 
@@ -16,7 +17,11 @@ from utilitaires import convertir_dollars_vers_centimes
 DOSSIER_BASE = Path(__file__).resolve().parent
 
 # Chemin vers le fichier stockant les informations des utilisateurs.
-FICHIER_UTILISATEURS = DOSSIER_BASE / "utilisateurs.txt"
+FICHIER_UTILISATEURS = DOSSIER_BASE / "utilisateurs.dat"
+
+# Ancien fichier texte des utilisateurs (une ligne "nom,hachage,solde" par utilisateur), converti au format binaire
+# au démarrage de l'application s'il est encore présent.
+ANCIEN_FICHIER_UTILISATEURS = DOSSIER_BASE / "utilisateurs.txt"
 
 # Chemin vers le fichier stockant les transactions entre utilisateurs.
 FICHIER_TRANSACTIONS = DOSSIER_BASE / "transactions.txt"
@@ -24,6 +29,16 @@ FICHIER_TRANSACTIONS = DOSSIER_BASE / "transactions.txt"
 # Solde initial en centimes attribué à chaque nouvel utilisateur.
 SOLDE_INITIAL = convertir_dollars_vers_centimes(1000)
 
+# Longueur maximale, en octets (UTF-8), d'un nom d'utilisateur.
+LONGUEUR_MAX_NOM_UTILISATEUR = 32
+
+# Format binaire d'un enregistrement du fichier des utilisateurs, de taille fixe : nom d'utilisateur (complété par des
+# octets nuls), hachage SHA-256 brut du mot de passe (32 octets) et solde en centimes (entier signé de 8 octets).
+STRUCTURE_UTILISATEUR = struct.Struct(f"<{LONGUEUR_MAX_NOM_UTILISATEUR}s32sq")
+
+# Format binaire du solde, dernier champ d'un enregistrement, réécrit seul lors d'une mise à jour du solde.
+STRUCTURE_SOLDE = struct.Struct("<q")
+
 # Nom d'utilisateur pour le compte administrateur de l'application.
 NOM_UTILISATEUR_ADMIN = "ift-1004-union"
 
@@ -36,3 +51,8 @@ FRAIS_TRANSACTIONS = [
     {"min": 1001, "max": 5000, "frais": 20},
     {"min": 5001, "max": math.inf, "frais": 25},
 ]
+
+# Bornes supérieures (incluses) des tranches de frais, en centimes, et pourcentages correspondants. Ces tableaux
+# parallèles, triés, permettent de trouver la tranche d'un montant par recherche dichotomique (voir `calculer_frais`).
+FRAIS_BORNES_CENTIMES = [tranche["max"] * 100 for tranche in FRAIS_TRANSACTIONS]
+FRAIS_POURCENTAGES = [tranche["frais"] for tranche in FRAIS_TRANSACTIONS]
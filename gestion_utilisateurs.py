@@ -2,18 +2,25 @@
 Ce module est responsable de la gestion des utilisateurs dans l'application IFT-1004 Union,
 incluant l'enregistrement de nouveaux utilisateurs et la connexion des utilisateurs existants.
 Il interagit avec le fichier des utilisateurs pour enregistrer et vérifier les informations des utilisateurs,
-tels que les noms d'utilisateurs, les mots de passe (sous forme hachée), et les soldes initiaux.
+tels que les noms d'utilisateurs, les mots de passe (sous forme hachée), et les soldes initiaux. Chaque utilisateur
+y est stocké sous la forme d'un enregistrement binaire de taille fixe (voir `STRUCTURE_UTILISATEUR`).
 
 Fonctions:
 - `enregistrer_utilisateur()`: Enregistre un nouveau utilisateur avec un solde initial.
 - `connecter_utilisateur()`: Connecte un utilisateur existant en vérifiant son nom d'utilisateur et son mot de passe.
 - `utilisateur_existe(nom_utilisateur)`: Vérifie si un utilisateur existe déjà dans le fichier des utilisateurs.
+- `obtenir_utilisateurs()`: Retourne l'index en mémoire des utilisateurs, chargé une seule fois depuis le fichier.
+- `sauvegarder_soldes(*noms_utilisateurs)`: Réécrit sur place le solde d'utilisateurs dans le fichier.
+- `migrer_ancien_fichier_utilisateurs()`: Convertit l'ancien fichier texte des utilisateurs au format binaire.
 
 Ce module utilise `configuration` pour accéder à des constantes globales, `utilitaires` pour des fonctions auxiliaires
 comme le hachage de mots de passe, et `transactions` pour enregistrer la transaction initiale lors de la création d'un
 nouveau compte utilisateur.
 
 Dépendances:
+- `os`: Pour détecter les modifications du fichier des utilisateurs faites hors de l'application.
+- `base64`: Pour décoder les hachages de l'ancien fichier texte des utilisateurs.
+- `mmap`: Pour lire le fichier des utilisateurs sans le copier en mémoire.
 - `secrets`: Pour comparer les hachages (https://docs.python.org/3/library/secrets.html#secrets.compare_digest).
 - `configuration`: Pour accéder à des constantes comme le nom de l'utilisateur admin, le chemin du fichier des
 utilisateurs, et le solde initial.
@@ -21,20 +28,42 @@ utilisateurs, et le solde initial.
 - `transactions`: Pour enregistrer la transaction initiale lors de la création d'un nouveau compte.
 """
 
+import os
+import base64
+import mmap
 import secrets
-from configuration import NOM_UTILISATEUR_ADMIN, FICHIER_UTILISATEURS, SOLDE_INITIAL
+from configuration import NOM_UTILISATEUR_ADMIN, FICHIER_UTILISATEURS, ANCIEN_FICHIER_UTILISATEURS, SOLDE_INITIAL, \
+    LONGUEUR_MAX_NOM_UTILISATEUR, STRUCTURE_UTILISATEUR, STRUCTURE_SOLDE
 from utilitaires import hacher_mot_de_passe
 import transactions
 
 
+# Index en mémoire des utilisateurs : nom d'utilisateur -> [hachage du mot de passe, solde en centimes, position du
+# solde dans le fichier (en octets)].
+# Chargé paresseusement lors du premier accès (voir `obtenir_utilisateurs`).
+_UTILISATEURS = None
+
+# Signature (date de modification en nanosecondes, taille en octets) du fichier des utilisateurs lors du dernier
+# chargement ou de la dernière écriture par l'application. Toute autre valeur signifie que le fichier a été modifié
+# ailleurs. La taille détecte un ajout fait dans le même intervalle d'horodatage que la dernière écriture.
+_UTILISATEURS_SIGNATURE = None
+
+# Position du solde à l'intérieur d'un enregistrement du fichier des utilisateurs.
+_DECALAGE_SOLDE = STRUCTURE_UTILISATEUR.size - STRUCTURE_SOLDE.size
+
+# Hachage de même longueur qu'un hachage réel, comparé lorsque l'utilisateur n'existe pas.
+_HACHAGE_FACTICE = hacher_mot_de_passe("")
+
+
 def enregistrer_utilisateur():
     """
     Enregistre un nouvel utilisateur dans le fichier des utilisateurs après avoir effectué
     les vérifications nécessaires.
     
     Demande à l'utilisateur de saisir un nom d'utilisateur et un mot de passe. Vérifie si le nom d'utilisateur existe
-    déjà et si le mot de passe est valide (non vide). En cas de succès, enregistre l'utilisateur avec un solde initial
-    et enregistre une transaction de ce solde depuis le compte administrateur vers le nouvel utilisateur.
+    déjà, s'il n'est pas trop long et si le mot de passe est valide (non vide). En cas de succès, enregistre
+    l'utilisateur avec un solde initial et enregistre une transaction de ce solde depuis le compte administrateur vers
+    le nouvel utilisateur.
     
     Returns:
         bool: True si l'utilisateur a été enregistré avec succès, sinon False.
@@ -46,15 +75,23 @@ def enregistrer_utilisateur():
         print("Le nom d'utilisateur et le mot de passe ne peuvent pas être vides.")
         return False
 
+    if len(nom_utilisateur.encode()) > LONGUEUR_MAX_NOM_UTILISATEUR:
+        print(f"Le nom d'utilisateur ne peut pas dépasser {LONGUEUR_MAX_NOM_UTILISATEUR} octets.")
+        return False
+
     if utilisateur_existe(nom_utilisateur):
         print("Ce nom d'utilisateur existe déjà.")
         return False
 
     hachage_mot_de_passe = hacher_mot_de_passe(mot_de_passe)
-    nouveau_utilisateur = f"{nom_utilisateur},{hachage_mot_de_passe},{SOLDE_INITIAL}\n"
+    nouveau_utilisateur = STRUCTURE_UTILISATEUR.pack(nom_utilisateur.encode(), hachage_mot_de_passe, SOLDE_INITIAL)
 
-    with open(FICHIER_UTILISATEURS, "a") as fichier_utilisateurs:
+    utilisateurs = obtenir_utilisateurs()
+    with open(FICHIER_UTILISATEURS, "ab") as fichier_utilisateurs:
+        position_solde = fichier_utilisateurs.tell() + _DECALAGE_SOLDE
         fichier_utilisateurs.write(nouveau_utilisateur)
+    utilisateurs[nom_utilisateur] = [hachage_mot_de_passe, SOLDE_INITIAL, position_solde]
+    _memoriser_signature()
 
     transactions.enregistrer_transaction(NOM_UTILISATEUR_ADMIN, nom_utilisateur, SOLDE_INITIAL)
 
@@ -67,7 +104,8 @@ def connecter_utilisateur():
     Connecte un utilisateur en vérifiant son nom d'utilisateur et son mot de passe.
 
     Demande à l'utilisateur de saisir son nom d'utilisateur et son mot de passe. Ces informations sont vérifiées
-    contre le fichier des utilisateurs. Si les identifiants sont corrects, l'utilisateur est considéré comme connecté.
+    contre l'index des utilisateurs, en temps constant. Si les identifiants sont corrects, l'utilisateur est considéré
+    comme connecté.
 
     Returns:
         str or None: Le nom d'utilisateur si la connexion est réussie, None sinon.
@@ -75,12 +113,15 @@ def connecter_utilisateur():
     nom_utilisateur = input("Nom d'utilisateur : ")
     mot_de_passe = input("Mot de passe : ")
 
-    with open(FICHIER_UTILISATEURS, "r") as fichier_utilisateurs:
-        for ligne in fichier_utilisateurs:
-            utilisateur, mot_de_passe_hache, _ = ligne.strip().split(",")
-            if utilisateur == nom_utilisateur and secrets.compare_digest(hacher_mot_de_passe(mot_de_passe), mot_de_passe_hache):
-                print("Connecté avec succès.")
-                return nom_utilisateur
+    hachage_entree = hacher_mot_de_passe(mot_de_passe)
+
+    # La comparaison est toujours effectuée, contre un hachage factice si l'utilisateur n'existe pas, afin que
+    # le temps de réponse ne révèle pas l'existence d'un nom d'utilisateur.
+    utilisateur = obtenir_utilisateurs().get(nom_utilisateur)
+    hachage_attendu = utilisateur[0] if utilisateur else _HACHAGE_FACTICE
+    if secrets.compare_digest(hachage_entree, hachage_attendu) and utilisateur is not None:
+        print("Connecté avec succès.")
+        return nom_utilisateur
 
     print("Nom d'utilisateur ou mot de passe incorrect.")
     return None
@@ -89,9 +130,8 @@ def connecter_utilisateur():
 def utilisateur_existe(nom_utilisateur):
     """Vérifie si un nom d'utilisateur existe déjà dans le fichier des utilisateurs.
 
-    Cette fonction parcourt le fichier des utilisateurs, ligne par ligne, pour rechercher un nom d'utilisateur
-    spécifique. Si le nom d'utilisateur est trouvé dans le fichier, la fonction retourne True,
-    sinon False.
+    La recherche se fait dans l'index en mémoire des utilisateurs (voir `obtenir_utilisateurs`), ce qui évite
+    de relire le fichier à chaque appel.
 
     Args:
         nom_utilisateur (str): Le nom d'utilisateur à rechercher.
@@ -99,9 +139,152 @@ def utilisateur_existe(nom_utilisateur):
     Returns:
         bool: True si le nom d'utilisateur est trouvé, sinon False.
     """
-    with open(FICHIER_UTILISATEURS, "r") as fichier_utilisateurs:
-        for ligne in fichier_utilisateurs:
-            utilisateur, _, _ = ligne.strip().split(",")
-            if utilisateur == nom_utilisateur:
-                return True
-    return False
+    return nom_utilisateur in obtenir_utilisateurs()
+
+
+def obtenir_utilisateurs():
+    """Retourne l'index en mémoire des utilisateurs.
+
+    Le fichier des utilisateurs est lu une seule fois, lors du premier appel, puis les recherches suivantes
+    se font directement dans le dictionnaire. Si le fichier a été modifié hors de l'application depuis (sa date de
+    modification ou sa taille a changé), l'index est rechargé. Toute modification d'un solde dans l'index doit être
+    suivie d'un appel à `sauvegarder_soldes` pour être persistée.
+
+    Returns:
+        dict: Un dictionnaire associant chaque nom d'utilisateur à une liste
+            [hachage du mot de passe, solde, position du solde dans le fichier].
+    """
+    global _UTILISATEURS
+    if _UTILISATEURS is None or _signature_fichier_utilisateurs() != _UTILISATEURS_SIGNATURE:
+        _UTILISATEURS = _charger_utilisateurs()
+        _memoriser_signature()
+    return _UTILISATEURS
+
+
+def sauvegarder_soldes(*noms_utilisateurs):
+    """Réécrit sur place, dans le fichier des utilisateurs, le solde des utilisateurs spécifiés.
+
+    Le solde ayant une taille fixe (`STRUCTURE_SOLDE`), seuls ses octets sont réécrits, à la position
+    conservée dans l'index en mémoire; le reste du fichier n'est pas touché. Chaque solde est une écriture
+    distincte : plusieurs soldes ne sont pas persistés de manière atomique.
+
+    Args:
+        *noms_utilisateurs (str): Les noms des utilisateurs dont le solde doit être persisté.
+    """
+    # L'index n'est pas revalidé ici : ce sont les soldes qui viennent d'y être modifiés qu'il faut persister.
+    utilisateurs = _UTILISATEURS
+    with open(FICHIER_UTILISATEURS, "r+b") as fichier_utilisateurs:
+        for nom_utilisateur in noms_utilisateurs:
+            _, solde, position_solde = utilisateurs[nom_utilisateur]
+            fichier_utilisateurs.seek(position_solde)
+            fichier_utilisateurs.write(STRUCTURE_SOLDE.pack(solde))
+    _memoriser_signature()
+
+
+def migrer_ancien_fichier_utilisateurs():
+    """Convertit, une seule fois, l'ancien fichier texte des utilisateurs au format binaire.
+
+    Si `ANCIEN_FICHIER_UTILISATEURS` existe encore, chacune de ses lignes ("nom,hachage,solde") est convertie en
+    enregistrement binaire dans `FICHIER_UTILISATEURS`, puis l'ancien fichier est renommé avec l'extension ".bak"
+    afin de ne pas être converti à nouveau. Les comptes existants, et donc leur historique dans le fichier des
+    transactions, sont ainsi conservés. La conversion est refusée si le fichier binaire contient déjà des
+    utilisateurs, ou si l'ancien fichier ne peut pas être converti (ligne invalide, nom trop long).
+
+    Returns:
+        bool: True si l'application peut démarrer (aucun ancien fichier ou conversion réussie), sinon False.
+    """
+    if not ANCIEN_FICHIER_UTILISATEURS.is_file():
+        return True
+
+    if FICHIER_UTILISATEURS.is_file() and FICHIER_UTILISATEURS.stat().st_size > 0:
+        print(f"Les fichiers {ANCIEN_FICHIER_UTILISATEURS.name} et {FICHIER_UTILISATEURS.name} contiennent tous deux "
+              f"des utilisateurs. Retirez l'un des deux avant de démarrer l'application.")
+        return False
+
+    enregistrements = []
+    with open(ANCIEN_FICHIER_UTILISATEURS, "r") as ancien_fichier:
+        for numero_ligne, ligne in enumerate(ancien_fichier, start=1):
+            if not ligne.strip():
+                continue
+            try:
+                utilisateur, mot_de_passe_hache, solde = ligne.strip().split(",")
+                nom_encode = utilisateur.encode()
+                if len(nom_encode) > LONGUEUR_MAX_NOM_UTILISATEUR:
+                    raise ValueError(f"nom de plus de {LONGUEUR_MAX_NOM_UTILISATEUR} octets")
+                hachage = _decoder_ancien_hachage(mot_de_passe_hache)
+                enregistrements.append(STRUCTURE_UTILISATEUR.pack(nom_encode, hachage, int(solde)))
+            except ValueError as erreur:
+                print(f"Impossible de convertir {ANCIEN_FICHIER_UTILISATEURS.name} (ligne {numero_ligne}) : {erreur}.")
+                return False
+
+    fichier_temporaire = FICHIER_UTILISATEURS.with_suffix(".tmp")
+    with open(fichier_temporaire, "wb") as fichier_utilisateurs:
+        fichier_utilisateurs.write(b"".join(enregistrements))
+    os.replace(fichier_temporaire, FICHIER_UTILISATEURS)
+    os.replace(ANCIEN_FICHIER_UTILISATEURS, ANCIEN_FICHIER_UTILISATEURS.with_suffix(".bak"))
+
+    print(f"{len(enregistrements)} utilisateur(s) converti(s) depuis {ANCIEN_FICHIER_UTILISATEURS.name}.")
+    return True
+
+
+def _decoder_ancien_hachage(mot_de_passe_hache):
+    """Convertit un hachage de l'ancien fichier texte (hexadécimal ou base64) en hachage SHA-256 brut.
+
+    Args:
+        mot_de_passe_hache (str): Le hachage tel qu'il apparaît dans l'ancien fichier des utilisateurs.
+
+    Returns:
+        bytes: Le hachage SHA-256 brut (32 octets).
+
+    Raises:
+        ValueError: Si le hachage n'est dans aucun des deux formats.
+    """
+    try:
+        if len(mot_de_passe_hache) == 64:
+            hachage = bytes.fromhex(mot_de_passe_hache)
+        else:
+            hachage = base64.urlsafe_b64decode(mot_de_passe_hache + "=" * (-len(mot_de_passe_hache) % 4))
+    except ValueError:
+        hachage = b""
+    if len(hachage) != 32:
+        raise ValueError("hachage de mot de passe invalide")
+    return hachage
+
+
+def _signature_fichier_utilisateurs():
+    """Retourne la signature actuelle du fichier des utilisateurs.
+
+    Returns:
+        tuple: La date de modification (en nanosecondes) et la taille (en octets) du fichier.
+    """
+    etat = os.stat(FICHIER_UTILISATEURS)
+    return etat.st_mtime_ns, etat.st_size
+
+
+def _memoriser_signature():
+    """Mémorise la signature actuelle du fichier des utilisateurs, après un chargement ou une écriture."""
+    global _UTILISATEURS_SIGNATURE
+    _UTILISATEURS_SIGNATURE = _signature_fichier_utilisateurs()
+
+
+def _charger_utilisateurs():
+    """Lit le fichier des utilisateurs et construit l'index en mémoire.
+
+    Le fichier est projeté en mémoire (`mmap`) et chaque enregistrement est décodé directement à sa position.
+
+    Returns:
+        dict: Un dictionnaire associant chaque nom d'utilisateur à une liste
+            [hachage du mot de passe, solde, position du solde dans le fichier].
+    """
+    utilisateurs = {}
+    with open(FICHIER_UTILISATEURS, "rb") as fichier_utilisateurs:
+        # Un fichier vide ne peut pas être projeté en mémoire.
+        if os.fstat(fichier_utilisateurs.fileno()).st_size == 0:
+            return utilisateurs
+
+        with mmap.mmap(fichier_utilisateurs.fileno(), 0, access=mmap.ACCESS_READ) as contenu:
+            for position in range(0, len(contenu) - STRUCTURE_UTILISATEUR.size + 1, STRUCTURE_UTILISATEUR.size):
+                utilisateur, mot_de_passe_hache, solde = STRUCTURE_UTILISATEUR.unpack_from(contenu, position)
+                utilisateurs[utilisateur.rstrip(b"\0").decode()] = [mot_de_passe_hache, solde,
+                                                                    position + _DECALAGE_SOLDE]
+    return utilisateurs
@@ -18,23 +18,26 @@ d'autres modules comme `affichages`, `utilitaires`, `gestion_utilisateurs`, et `
 from affichages import afficher_banniere, afficher_menu_principal, afficher_menu_utilisateur
 from configuration import FICHIER_UTILISATEURS, FICHIER_TRANSACTIONS
 from utilitaires import garantir_existence_fichier
-from gestion_utilisateurs import enregistrer_utilisateur, connecter_utilisateur
+from gestion_utilisateurs import enregistrer_utilisateur, connecter_utilisateur, migrer_ancien_fichier_utilisateurs
 from transactions import envoyer_argent, consulter_solde, consulter_transactions
 
 
 def main():
     """Fonction principale de l'application IFT-1004 Union.
 
-    Cette fonction lance l'application, s'assurant de l'existence des fichiers nécessaires,
-    affiche une bannière de bienvenue et gère le flux principal de l'application, y compris
-    l'affichage des menus et la gestion des actions des utilisateurs. L'utilisateur peut choisir
-    de créer un compte, se connecter avec un compte existant, ou quitter l'application. Une fois
-    connecté, l'utilisateur a accès à des actions supplémentaires telles qu'envoyer de l'argent,
-    consulter son solde, consulter ses transactions, ou se déconnecter.
+    Cette fonction lance l'application, convertissant au besoin l'ancien fichier texte des utilisateurs
+    et s'assurant de l'existence des fichiers nécessaires, affiche une bannière de bienvenue et gère
+    le flux principal de l'application, y compris l'affichage des menus et la gestion des actions des
+    utilisateurs. L'utilisateur peut choisir de créer un compte, se connecter avec un compte existant,
+    ou quitter l'application. Une fois connecté, l'utilisateur a accès à des actions supplémentaires
+    telles qu'envoyer de l'argent, consulter son solde, consulter ses transactions, ou se déconnecter.
 
     La boucle principale gère la navigation entre le menu principal et le menu utilisateur,
     traitant les entrées de l'utilisateur et exécutant les actions correspondantes.
     """
+    if not migrer_ancien_fichier_utilisateurs():
+        return
+
     garantir_existence_fichier(FICHIER_UTILISATEURS)
     garantir_existence_fichier(FICHIER_TRANSACTIONS)
 
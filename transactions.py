@@ -11,30 +11,42 @@ Fonctions:
 - `consulter_solde(nom_utilisateur)`: Affiche le solde actuel d'un utilisateur.
 - `consulter_transactions(nom_utilisateur)`: Affiche l'historique des transactions d'un utilisateur.
 - `ajouter_au_solde(nom_utilisateur, montant)`: Met à jour le solde d'un utilisateur suite à une transaction.
+- `appliquer_transfert(expediteur, destinataire, debit, credit)`: Met à jour les soldes de l'expéditeur et du
+  destinataire en une seule ouverture du fichier des utilisateurs.
 - `enregistrer_transaction(expediteur, destinataire, montant, frais=0)`: Enregistre une transaction dans le fichier des
 transactions.
 - `calculer_frais(montant)`: Calcule les frais de transaction basés sur le montant envoyé.
 
 Ce module interagit directement avec `configuration` pour accéder à des constantes de configuration,
 avec `utilitaires` pour des opérations telles que l'affichage des tableaux ou le formatage des montants,
-et lit/mise à jour les fichiers `FICHIER_UTILISATEURS` et `FICHIER_TRANSACTIONS` pour gérer les données.
+avec `gestion_utilisateurs` pour lire et mettre à jour les soldes (via l'index en mémoire des utilisateurs),
+et lit/mise à jour le fichier `FICHIER_TRANSACTIONS` pour gérer l'historique des transactions.
 
 Dépendances:
 - `os`: Pour la gestion des fichiers.
+- `atexit`: Pour fermer le fichier des transactions à la sortie de l'application.
+- `bisect`: Pour trouver la tranche de frais d'un montant.
 - `datetime`: Pour enregistrer la date et l'heure des transactions.
 - `configuration`: Pour accéder aux chemins des fichiers et aux configurations des frais de transaction.
 - `utilitaires`: Pour des fonctions auxiliaires comme l'affichage de tableaux formatés, la conversion de montants en
  dollars vers les centimes, le formatage de montants en dollars.
-- `gestion_utilisateurs`: Pour vérifier l'existence d'un utilisateur dans le système.
+- `gestion_utilisateurs`: Pour accéder à l'index en mémoire des utilisateurs et persister leurs soldes.
 """
 
 import os
+import atexit
+import bisect
 from datetime import datetime
-from configuration import FICHIER_UTILISATEURS, FICHIER_TRANSACTIONS, FRAIS_TRANSACTIONS
-from utilitaires import afficher_tableau, convertir_dollars_vers_centimes, formater_argent
+from configuration import FICHIER_TRANSACTIONS, FRAIS_BORNES_CENTIMES, FRAIS_POURCENTAGES
+from utilitaires import afficher_tableau, calculer_largeurs, convertir_dollars_vers_centimes, formater_argent
 import gestion_utilisateurs
 
 
+# Fichier des transactions, ouvert en ajout lors du premier enregistrement puis conservé ouvert jusqu'à la sortie de
+# l'application, afin que les écritures soient regroupées dans son tampon.
+_FICHIER_TRANSACTIONS_OUVERT = None
+
+
 def envoyer_argent(nom_utilisateur):
     """
     Permet à un utilisateur d'envoyer de l'argent à un autre utilisateur en prenant en compte des frais de transaction.
@@ -52,28 +64,28 @@ def envoyer_argent(nom_utilisateur):
     et crédité au destinataire.
     """
     destinataire = input("Entrez le nom du destinataire : ")
-    montant_dollars = float(input("Entrez le montant à envoyer en dollars : "))
+    try:
+        montant_centimes = convertir_dollars_vers_centimes(input("Entrez le montant à envoyer en dollars : "))
+    except ValueError:
+        print("Montant invalide.")
+        return False
 
     if destinataire == nom_utilisateur:
         print("Vous ne pouvez pas vous envoyer de l'argent à vous-même.")
         return False
 
-    if montant_dollars <= 0:
+    if montant_centimes <= 0:
         print("Le montant doit être positif.")
         return False
 
     solde_exp = recuperer_solde(nom_utilisateur)
-    montant_centimes = convertir_dollars_vers_centimes(montant_dollars)
     frais = calculer_frais(montant_centimes)
 
     if solde_exp < montant_centimes + frais:
         print("Fonds insuffisants.")
         return False
 
-    solde_dest = recuperer_solde(destinataire)
-
-    if not ajouter_au_solde(nom_utilisateur, -montant_centimes - frais) or \
-            not ajouter_au_solde(destinataire, montant_centimes):
+    if not appliquer_transfert(nom_utilisateur, destinataire, montant_centimes + frais, montant_centimes):
         print("Une erreur s'est produite lors de la transaction.")
         return False
 
@@ -93,14 +105,11 @@ def recuperer_solde(nom_utilisateur):
     Returns:
         int: Le solde de l'utilisateur en centimes.
 
-    Cette fonction lit le fichier des utilisateurs et retourne le solde en centimes du nom d'utilisateur spécifié.
+    Cette fonction consulte l'index en mémoire des utilisateurs et retourne le solde en centimes du nom d'utilisateur
+    spécifié, ou 0 si l'utilisateur n'existe pas.
     """
-    with open(FICHIER_UTILISATEURS, "r") as fichier:
-        for ligne in fichier:
-            utilisateur, _, solde = ligne.strip().split(",")
-            if utilisateur == nom_utilisateur:
-                return int(solde)
-    return 0
+    utilisateur = gestion_utilisateurs.obtenir_utilisateurs().get(nom_utilisateur)
+    return utilisateur[1] if utilisateur else 0
 
 
 def consulter_solde(nom_utilisateur):
@@ -127,22 +136,38 @@ def consulter_transactions(nom_utilisateur):
 
     Cette fonction parcourt le fichier des transactions et affiche toutes les transactions où l'utilisateur
     spécifié est l'expéditeur ou le destinataire. Les transactions sont affichées dans un tableau formaté (grâce à la
-    fonction utilitaire `afficher_tableau`).
+    fonction utilitaire `afficher_tableau`). Le fichier est parcouru deux fois (largeurs des colonnes, puis affichage)
+    plutôt que d'accumuler les transactions en mémoire.
+    """
+    if _FICHIER_TRANSACTIONS_OUVERT is not None:
+        _FICHIER_TRANSACTIONS_OUVERT.flush()
+
+    en_tetes = ["Date/Heure", "Expéditeur", "Destinataire", "Montant", "Frais"]
+
+    # Premier parcours : largeur des colonnes; second parcours : affichage des lignes.
+    largeurs = calculer_largeurs(_lire_transactions_utilisateur(nom_utilisateur), en_tetes)
+    if largeurs:
+        afficher_tableau(_lire_transactions_utilisateur(nom_utilisateur), en_tetes, largeurs)
+    else:
+        print("Aucune transaction trouvée pour cet utilisateur.")
+
+
+def _lire_transactions_utilisateur(nom_utilisateur):
     """
-    transactions_utilisateur = []
+    Parcourt le fichier des transactions et produit, une à une, les transactions impliquant l'utilisateur.
+
+    Args:
+        nom_utilisateur (str): Le nom de l'utilisateur dont on cherche les transactions.
 
+    Yields:
+        list of str: La date/heure, l'expéditeur, le destinataire, le montant et les frais (formatés) de chaque
+        transaction où l'utilisateur est l'expéditeur ou le destinataire.
+    """
     with open(FICHIER_TRANSACTIONS, "r") as fichier_transactions:
         for ligne in fichier_transactions:
             expediteur, destinataire, montant, frais, date_heure = ligne.strip().split(",")
             if expediteur == nom_utilisateur or destinataire == nom_utilisateur:
-                montant_formatte = formater_argent(int(montant))
-                frais_formatte = formater_argent(int(frais))
-                transactions_utilisateur.append([date_heure, expediteur, destinataire, montant_formatte, frais_formatte])
-
-    if transactions_utilisateur:
-        afficher_tableau(transactions_utilisateur, ["Date/Heure", "Expéditeur", "Destinataire", "Montant", "Frais"])
-    else:
-        print("Aucune transaction trouvée pour cet utilisateur.")
+                yield [date_heure, expediteur, destinataire, formater_argent(int(montant)), formater_argent(int(frais))]
 
 
 def ajouter_au_solde(nom_utilisateur, montant):
@@ -156,21 +181,52 @@ def ajouter_au_solde(nom_utilisateur, montant):
     Returns:
         bool: True si la mise à jour du solde a réussi, False sinon.
 
-    Cette fonction lit le fichier des utilisateurs, met à jour le solde de l'utilisateur spécifié avec le montant
-    donné, et réécrit le fichier avec le nouveau solde. Elle retourne True si l'opération s'est déroulée avec succès,
-    sinon False.
+    Cette fonction met à jour le solde de l'utilisateur spécifié dans l'index en mémoire des utilisateurs, puis
+    réécrit sur place le nouveau solde dans le fichier. Elle retourne True si l'opération s'est déroulée avec
+    succès, sinon False (par exemple si l'utilisateur n'existe pas).
+    """
+    utilisateur = gestion_utilisateurs.obtenir_utilisateurs().get(nom_utilisateur)
+    if utilisateur is None:
+        return False
+
+    utilisateur[1] += montant
+    gestion_utilisateurs.sauvegarder_soldes(nom_utilisateur)
+
+    return True
+
+
+def appliquer_transfert(expediteur, destinataire, debit, credit):
+    """
+    Débite l'expéditeur et crédite le destinataire en une seule ouverture du fichier des utilisateurs.
+
+    Args:
+        expediteur (str): Le nom de l'utilisateur à débiter.
+        destinataire (str): Le nom de l'utilisateur à créditer.
+        debit (int): Le montant en centimes retiré du solde de l'expéditeur (frais inclus).
+        credit (int): Le montant en centimes ajouté au solde du destinataire.
+
+    Returns:
+        bool: True si le transfert a été appliqué, False si l'un des deux utilisateurs n'existe pas ou si le
+        solde de l'expéditeur est insuffisant.
+
+    Le solde de l'expéditeur est vérifié dans le même index que celui qui est débité. Les deux soldes sont modifiés
+    dans l'index en mémoire, puis réécrits sur place dans le fichier des utilisateurs, lors d'une seule ouverture de
+    celui-ci.
+
+    Les deux soldes sont réécrits par deux écritures distinctes : le transfert n'est donc pas atomique. Une
+    interruption entre les deux peut laisser l'expéditeur débité sans que le destinataire soit crédité. C'est le prix
+    de la mise à jour sur place, qui évite de réécrire tout le fichier à chaque transfert.
     """
-    lignes_utilisateurs = []
+    utilisateurs = gestion_utilisateurs.obtenir_utilisateurs()
+    if expediteur not in utilisateurs or destinataire not in utilisateurs:
+        return False
 
-    with open(FICHIER_UTILISATEURS, "r") as fichier_utilisateurs:
-        for ligne in fichier_utilisateurs:
-            utilisateur, mot_de_passe, solde = ligne.strip().split(",")
-            if utilisateur == nom_utilisateur:
-                solde = str(int(solde) + montant)
-            lignes_utilisateurs.append(f"{utilisateur},{mot_de_passe},{solde}\n")
+    if utilisateurs[expediteur][1] < debit:
+        return False
 
-    with open(FICHIER_UTILISATEURS, "w") as fichier_utilisateurs:
-        fichier_utilisateurs.writelines(lignes_utilisateurs)
+    utilisateurs[expediteur][1] -= debit
+    utilisateurs[destinataire][1] += credit
+    gestion_utilisateurs.sauvegarder_soldes(expediteur, destinataire)
 
     return True
 
@@ -187,13 +243,26 @@ def enregistrer_transaction(expediteur, destinataire, montant, frais=0):
 
     Cette fonction enregistre une transaction dans le fichier des transactions en y ajoutant une nouvelle ligne
     contenant les informations sur l'expéditeur, le destinataire, le montant, les frais et la date/heure de la
-    transaction.
+    transaction. L'écriture passe par le tampon du fichier ouvert (voir `_obtenir_fichier_transactions`).
     """
-    date_heure = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    date_heure = datetime.now().isoformat(" ", "seconds")
     nouvelle_transaction = f"{expediteur},{destinataire},{montant},{frais},{date_heure}\n"
 
-    with open(FICHIER_TRANSACTIONS, "a") as fichier_transactions:
-        fichier_transactions.write(nouvelle_transaction)
+    _obtenir_fichier_transactions().write(nouvelle_transaction)
+
+
+def _obtenir_fichier_transactions():
+    """
+    Retourne le fichier des transactions ouvert en ajout, en l'ouvrant au premier appel.
+
+    Returns:
+        io.TextIOWrapper: Le fichier des transactions, avec un tampon de 64 Kio, fermé automatiquement à la sortie.
+    """
+    global _FICHIER_TRANSACTIONS_OUVERT
+    if _FICHIER_TRANSACTIONS_OUVERT is None:
+        _FICHIER_TRANSACTIONS_OUVERT = open(FICHIER_TRANSACTIONS, "a", buffering=64 * 1024)
+        atexit.register(_FICHIER_TRANSACTIONS_OUVERT.close)
+    return _FICHIER_TRANSACTIONS_OUVERT
 
 
 def calculer_frais(montant):
@@ -207,10 +276,7 @@ def calculer_frais(montant):
         int: Les frais de transaction en centimes.
 
     Cette fonction calcule les frais de transaction en fonction de la structure définie dans le fichier de configuration.
+    La tranche applicable est la première dont la borne supérieure est supérieure ou égale au montant.
     """
-    from configuration import FRAIS_TRANSACTIONS
-
-    for tranche in FRAIS_TRANSACTIONS:
-        if tranche["min"] <= montant <= tranche["max"]:
-            return int(montant * tranche["frais"] / 100)
-    return 0
+    tranche = bisect.bisect_left(FRAIS_BORNES_CENTIMES, montant)
+    return montant * FRAIS_POURCENTAGES[tranche] // 100
@@ -9,15 +9,16 @@ Fonctions:
 - `garantir_existence_fichier(chemin_fichier)`: S'assure qu'un fichier existe; le crée vide le cas échéant.
 - `convertir_dollars_vers_centimes(montant_dollars)`: Convertit un montant en dollars en centimes.
 - `formater_argent(montant_en_centimes)`: Convertit un montant en centimes en une chaîne formatée en dollars.
-- `afficher_tableau(lignes, en_tetes)`: Affiche des données sous forme de tableau dans la console.
+- `calculer_largeurs(lignes, en_tetes)`: Calcule la largeur de chaque colonne d'un tableau en un seul parcours.
+- `afficher_tableau(lignes, en_tetes, largeurs=None)`: Affiche des données sous forme de tableau dans la console.
 
 Ce module joue un rôle crucial dans la manipulation des données et l'interface utilisateur de l'application,
 facilitant la gestion des informations des utilisateurs et des transactions, ainsi que l'amélioration de l'expérience
 utilisateur par la présentation claire des informations.
 
 Dépendances:
-- `os`: Utilisé pour vérifier l'existence de fichiers et les créer si nécessaire.
 - `hashlib`: Nécessaire pour le hachage de mots de passe en utilisant SHA-256.
+- `pathlib`: Utilisé pour créer les fichiers nécessaires s'ils n'existent pas.
 - `secrets`: Pour comparer les hachages (https://docs.python.org/3/library/secrets.html#secrets.compare_digest).
 - `configuration`: Importe des constantes utilisées pour les chemins de fichiers et d'autres paramètres globaux de
 l'application.
@@ -27,9 +28,9 @@ Note:
     l'application, contribuant à la modularité et à la maintenance du code.
 """
 
-import os
 import hashlib
 import secrets
+from pathlib import Path
 
 
 def hacher_mot_de_passe(mot_de_passe):
@@ -37,42 +38,59 @@ def hacher_mot_de_passe(mot_de_passe):
 
     Cette fonction prend un mot de passe en clair comme entrée et retourne
     son hash SHA-256, offrant une forme sécurisée pour stocker ou comparer
-    des mots de passe.
+    des mots de passe. Le hash est retourné sous forme brute (32 octets),
+    tel qu'il est stocké dans le fichier des utilisateurs.
 
     Args:
         mot_de_passe (str): Le mot de passe en clair à hacher.
 
     Returns:
-        str: Le hash SHA-256 du mot de passe.
+        bytes: Le hash SHA-256 du mot de passe.
     """
-    return hashlib.sha256(mot_de_passe.encode()).hexdigest()
+    return hashlib.sha256(mot_de_passe.encode()).digest()
 
 
 def garantir_existence_fichier(chemin_fichier):
     """S'assure qu'un fichier existe; le crée vide le cas échéant.
 
-    Cette fonction vérifie si un fichier existe à l'emplacement spécifié par `chemin_fichier`.
-    Si le fichier n'existe pas, il est créé vide, permettant ainsi de garantir son existence
-    pour les opérations futures.
+    Si aucun fichier n'existe à l'emplacement spécifié par `chemin_fichier`, il est créé vide,
+    permettant ainsi de garantir son existence pour les opérations futures. Un fichier existant
+    n'est jamais tronqué.
 
     Args:
         chemin_fichier (str): Le chemin complet vers le fichier à vérifier ou à créer.
     """
-    if not os.path.isfile(chemin_fichier):
-        with open(chemin_fichier, "w"):
-            pass  # Créer simplement le fichier sans rien écrire
+    Path(chemin_fichier).touch(exist_ok=True)
 
 
 def convertir_dollars_vers_centimes(montant_dollars):
     """Convertit un montant en dollars en centimes.
 
+    Le montant est analysé sous forme de texte (partie entière et partie décimale) plutôt qu'en virgule
+    flottante, ce qui évite les erreurs d'arrondi (par exemple, 0.29 $ donne bien 29 centimes). Les chiffres
+    au-delà du deuxième après le point sont ignorés.
+
     Args:
-        montant_dollars (float ou int): Le montant en dollars à convertir.
+        montant_dollars (str ou int): Le montant en dollars à convertir (ex. : "12.5" ou 1000).
 
     Returns:
         int: Le montant en centimes.
+
+    Raises:
+        ValueError: Si le montant n'est pas un nombre valide (seuls un signe initial, des chiffres et un point
+            décimal sont acceptés).
     """
-    return int(montant_dollars * 100)
+    montant = str(montant_dollars).strip()
+    negatif = montant.startswith("-")
+    if montant[:1] in ("+", "-"):
+        montant = montant[1:]
+
+    dollars, _, centimes = montant.partition(".")
+    if not (dollars or centimes) or (dollars and not dollars.isdigit()) or (centimes and not centimes.isdigit()):
+        raise ValueError(f"Montant invalide : {montant_dollars!r}")
+
+    montant_centimes = int(dollars or "0") * 100 + int((centimes + "00")[:2])
+    return -montant_centimes if negatif else montant_centimes
 
 
 def formater_argent(montant_en_centimes):
@@ -90,18 +108,47 @@ def formater_argent(montant_en_centimes):
     return f"{dollars:,.2f} $" if centimes != 0 else f"{dollars:,.0f} $"
 
 
-def afficher_tableau(lignes, en_tetes):
+def calculer_largeurs(lignes, en_tetes):
+    """Calcule la largeur de chaque colonne d'un tableau en un seul parcours des lignes.
+
+    Les lignes ne sont pas conservées : `lignes` peut donc être un générateur, ce qui permet de calculer
+    les largeurs d'un tableau sans le charger entièrement en mémoire.
+
+    Args:
+        lignes (iterable of list): Les lignes du tableau, parcourues une seule fois.
+        en_tetes (list of str): Une liste de chaînes de caractères représentant les
+            noms des colonnes du tableau.
+
+    Returns:
+        list of int or None: La largeur de chaque colonne, ou None si `lignes` est vide.
+    """
+    largeurs = [len(en_tete) for en_tete in en_tetes]
+    vide = True
+    for ligne in lignes:
+        vide = False
+        for idx, item in enumerate(ligne):
+            largeurs[idx] = max(largeurs[idx], len(str(item)))
+    return None if vide else largeurs
+
+
+def afficher_tableau(lignes, en_tetes, largeurs=None):
     """Affiche des données sous forme de tableau dans la console.
 
     Args:
         lignes (list of list): Une liste de listes, où chaque sous-liste représente les
-            données d'une ligne du tableau à afficher.
+            données d'une ligne du tableau à afficher. Si `largeurs` est fourni, `lignes`
+            peut être n'importe quel itérable (ex. : un générateur); il est parcouru une seule fois.
         en_tetes (list of str): Une liste de chaînes de caractères représentant les
             noms des colonnes du tableau.
+        largeurs (list of int, optional): La largeur de chaque colonne, telle que calculée par
+            `calculer_largeurs`. Calculée à partir de `lignes` si elle n'est pas fournie.
     """
-    # Trouver la largeur maximale de chaque colonne
-    largeurs = [len(max([str(ligne[idx]) for ligne in lignes] + [en_tete], key=len)) for idx, en_tete in
-                enumerate(en_tetes)]
+    if largeurs is None:
+        # Convertir une seule fois chaque cellule en chaîne de caractères
+        lignes = [[str(item) for item in ligne] for ligne in lignes]
+
+        # Trouver la largeur maximale de chaque colonne
+        largeurs = calculer_largeurs(lignes, en_tetes) or [len(en_tete) for en_tete in en_tetes]
 
     # Créer la ligne d'en-tête
     en_tete_formate = ' | '.join(en_tete.center(largeurs[idx]) for idx, en_tete in enumerate(en_tetes))
@@ -120,5 +167,3 @@ def afficher_tableau(lignes, en_tetes):
         print('| ' + ligne_formatee + ' |')
 
     print(ligne_separation)
-
-